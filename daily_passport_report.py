@@ -5,15 +5,32 @@ Daily Honda Passport report:
 - Email an HTML table of results via SMTP
 """
 
+import copy
+import gzip
+import hashlib
+import html
+import io
+import json
 import os
 import sys
 import smtplib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
 from email.message import EmailMessage
 from typing import Any, Dict, List, Optional
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # much faster C JSON parser/serializer; optional
+except ImportError:
+    orjson = None
 
 # Load .env for local development
 load_dotenv()
@@ -45,6 +62,9 @@ MAX_RADIUS_ALLOWED = 100
 SUPABASE_URL = os.environ.get("SUPABASE_URL", "").rstrip("/")
 SUPABASE_SERVICE_ROLE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", "").strip()
 SUPABASE_TABLE = os.environ.get("SUPABASE_TABLE", "passport_listings")
+# Upserts are sent in chunks of this many rows so one bad row doesn't fail the
+# whole batch and large batches can POST concurrently.
+SUPABASE_CHUNK_ROWS = 25
 
 # Email configuration – works with any SMTP provider
 SMTP_HOST = os.environ.get("SMTP_HOST", "").strip()
@@ -57,29 +77,67 @@ EMAIL_TO = os.environ.get("EMAIL_TO", SMTP_USER)
 
 MAX_LISTINGS = int(os.environ.get("MAX_LISTINGS", "50"))
 
+# Set PASSPORT_CACHE=1 to reuse the day's fetched listings from disk between
+# runs (handy for repeated previews during development; saves API quota).
+# Production cron should leave it unset.
+PASSPORT_CACHE = os.environ.get("PASSPORT_CACHE", "") == "1"
+
 # Trim filtering
 EXCLUDED_TRIMS = {"sport", "trailsport"}
 
 
+# ---------------------------------------------------------------------------
+# HTTP session – shared across MarketCheck pagination and Supabase upserts so
+# keep-alive connections are reused instead of paying TCP+TLS setup per call.
+# ---------------------------------------------------------------------------
+
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=10,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504),
+        ),
+    ),
+)
+_SESSION.headers.update(
+    {
+        "User-Agent": "honda-passport-report/1.0",
+        "Accept": "application/json",
+        # Ask explicitly for compressed responses; JSON pages compress ~8x,
+        # which dominates pagination wall time on slow links.
+        "Accept-Encoding": "gzip, deflate",
+    }
+)
+
+
 # ---------------------------------------------------------------------------
 # MarketCheck client
 # ---------------------------------------------------------------------------
 
-def fetch_used_honda_passports() -> (List[Dict[str, Any]], int):
+@lru_cache(maxsize=1)
+def _year_filter(current_year: int) -> str:
     """
-    Fetch used 2020+ Honda Passport listings from MarketCheck with basic pagination.
+    Comma list of model years to query; cached per calendar year so repeated
+    fetches don't rebuild the string.
     """
-    if not MARKETCHECK_API_KEY:
-        raise RuntimeError("MARKETCHECK_API_KEY is not set in environment")
-
-    current_year = datetime.now().year
     if YEAR_LIST:
-        year_filter = YEAR_LIST
-    else:
-        # Build an explicit comma list (2020,2021,...) because some accounts interpret ranges as a single year.
-        year_filter = ",".join(str(y) for y in range(MIN_YEAR, current_year + 1))
+        return YEAR_LIST
+    # Build an explicit comma list (2020,2021,...) because some accounts interpret ranges as a single year.
+    return ",".join(str(y) for y in range(MIN_YEAR, current_year + 1))
+
 
-    base_params = {
+@lru_cache(maxsize=1)
+def _base_params(year_filter: str) -> Dict[str, Any]:
+    """
+    Shared MarketCheck query params (everything but paging). Cached; callers
+    must copy before adding per-page keys.
+    """
+    params = {
         "api_key": MARKETCHECK_API_KEY,
         "car_type": "used",
         "make": TARGET_MAKE,
@@ -90,101 +148,288 @@ def fetch_used_honda_passports() -> (List[Dict[str, Any]], int):
     }
 
     if COUNTRY:
-        base_params["country"] = COUNTRY
+        params["country"] = COUNTRY
     if STATE_CODE:
-        base_params["state"] = STATE_CODE
+        params["state"] = STATE_CODE
     if ZIP_CODE:
-        base_params["zip"] = ZIP_CODE
-        base_params["radius"] = min(RADIUS_MILES, MAX_RADIUS_ALLOWED)
+        params["zip"] = ZIP_CODE
+        params["radius"] = min(RADIUS_MILES, MAX_RADIUS_ALLOWED)
+
+    return params
+
+
+def _fetch_page(
+    base_params: Dict[str, Any],
+    start: int,
+    rows_per_page: int,
+    listings_key: Optional[str] = None,
+) -> (List[Dict[str, Any]], Optional[int], str):
+    """
+    Fetch a single MarketCheck results page at offset `start`.
+
+    `listings_key` is the payload key holding the listings array. Pass None on
+    the first page to probe it ("listings" vs "results"); reuse the returned
+    key on later pages so they skip the fallback lookups. num_found is only
+    populated on the probe page.
+    Returns (page_listings, num_found, listings_key).
+    """
+    params = dict(base_params, start=start, rows=rows_per_page)
+
+    try:
+        resp = _SESSION.get(MARKETCHECK_BASE_URL, params=params, timeout=30)
+    except requests.RequestException as exc:
+        raise RuntimeError(f"Error calling MarketCheck API: {exc}") from exc
+
+    if resp.status_code != 200:
+        raise RuntimeError(f"MarketCheck API error {resp.status_code}: {resp.text[:500]}")
+
+    data = orjson.loads(resp.content) if orjson is not None else resp.json()
 
-    listings: List[Dict[str, Any]] = []
     num_found: Optional[int] = None
-    rows_per_page = min(MAX_LISTINGS, 50)  # stay friendly with the API defaults/limits
-    start = 0
+    if listings_key is None:
+        # Probe which key this account's response schema uses; later pages
+        # look it up directly instead of re-walking the fallback chain.
+        listings_key = "listings" if "listings" in data else "results"
+        page_listings = data.get(listings_key) or []
+        num_found = data.get("num_found") or data.get("total") or len(page_listings)
+    else:
+        page_listings = data.get(listings_key) or []
 
-    while len(listings) < MAX_LISTINGS:
-        params = dict(base_params, start=start, rows=rows_per_page)
+    if not isinstance(page_listings, list):
+        raise RuntimeError("Unexpected API response format: 'listings' is not a list")
 
-        try:
-            resp = requests.get(MARKETCHECK_BASE_URL, params=params, timeout=30)
-        except requests.RequestException as exc:
-            raise RuntimeError(f"Error calling MarketCheck API: {exc}") from exc
+    return page_listings, num_found, listings_key
 
-        if resp.status_code != 200:
-            raise RuntimeError(f"MarketCheck API error {resp.status_code}: {resp.text[:500]}")
 
-        data = resp.json()
-        page_listings = data.get("listings") or data.get("results") or []
-        if not isinstance(page_listings, list):
-            raise RuntimeError("Unexpected API response format: 'listings' is not a list")
+def _cache_path(base_params: Dict[str, Any]) -> Path:
+    """
+    Per-day cache file for a given query; a new day yields a new path, so
+    stale entries simply stop matching.
+    """
+    today = datetime.now().strftime("%Y%m%d")
+    key = hashlib.sha1(
+        json.dumps(sorted(base_params.items()), default=str).encode("utf-8")
+    ).hexdigest()[:16]
+    return Path(tempfile.gettempdir()) / f"passport_mcache_{today}_{key}_{MAX_LISTINGS}.json"
+
+
+def fetch_used_honda_passports(current_year: Optional[int] = None) -> (List[Dict[str, Any]], int):
+    """
+    Fetch used 2020+ Honda Passport listings from MarketCheck with basic pagination.
+    Callers that already hold a timestamp can pass `current_year` to avoid a
+    second clock read (and any skew between it and their report date).
+
+    The first page is fetched synchronously to learn `num_found`; any remaining
+    pages are fetched concurrently since their offsets are then fully known.
+    Excluded trims (see `is_excluded_trim`) are dropped as pages arrive, and
+    pagination continues until MAX_LISTINGS *kept* rows are collected or the
+    API runs out — so a page full of Sport/TrailSport no longer shrinks the
+    report. With PASSPORT_CACHE=1 the day's result is cached on disk so
+    repeated preview runs skip the network entirely.
+    """
+    if not MARKETCHECK_API_KEY:
+        raise RuntimeError("MARKETCHECK_API_KEY is not set in environment")
 
-        if num_found is None:
-            num_found = data.get("num_found") or data.get("total") or len(page_listings)
+    if current_year is None:
+        current_year = datetime.now().year
+    base_params = _base_params(_year_filter(current_year))
 
-        listings.extend(page_listings)
+    cache_path = _cache_path(base_params) if PASSPORT_CACHE else None
+    if cache_path is not None and cache_path.exists():
+        raw = cache_path.read_bytes()
+        cached = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        return cached["listings"], cached["num_found"]
+
+    rows_per_page = min(MAX_LISTINGS, 50)  # stay friendly with the API defaults/limits
 
-        # Stop if we've reached the total, the requested max, or there are no more pages.
+    first_page, num_found, listings_key = _fetch_page(base_params, 0, rows_per_page)
+    num_found = int(num_found or len(first_page))
+
+    listings = [listing for listing in first_page if not is_excluded_trim(listing)]
+    fetched = len(first_page)
+    exhausted = len(first_page) < rows_per_page
+
+    # Remaining page offsets are known once the first page reports num_found;
+    # fetch them concurrently over the pooled session. Workers stay capped to
+    # respect MarketCheck rate limits.
+    starts = range(rows_per_page, min(MAX_LISTINGS, num_found), rows_per_page)
+    if starts and not exhausted:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            pages = {
+                start: pool.submit(_fetch_page, base_params, start, rows_per_page, listings_key)
+                for start in starts
+            }
+            for start in starts:
+                page_listings, _, _ = pages[start].result()
+                fetched += len(page_listings)
+                listings.extend(listing for listing in page_listings if not is_excluded_trim(listing))
+                if len(page_listings) < rows_per_page:
+                    exhausted = True
+                    break
+
+    # Excluded trims may have eaten into the quota; keep paging sequentially
+    # until enough kept rows are collected or the API runs out.
+    while not exhausted and len(listings) < MAX_LISTINGS and fetched < num_found:
+        page_listings, _, _ = _fetch_page(base_params, fetched, rows_per_page, listings_key)
+        fetched += len(page_listings)
+        listings.extend(listing for listing in page_listings if not is_excluded_trim(listing))
         if len(page_listings) < rows_per_page:
             break
-        if num_found is not None and len(listings) >= num_found:
-            break
-        start += rows_per_page
 
-    return listings[:MAX_LISTINGS], int(num_found or len(listings))
+    listings = listings[:MAX_LISTINGS]
+
+    if cache_path is not None:
+        payload = {"listings": listings, "num_found": num_found}
+        body = orjson.dumps(payload) if orjson is not None else json.dumps(payload).encode("utf-8")
+        cache_path.write_bytes(body)
+
+    return listings, num_found
 
 
 # ---------------------------------------------------------------------------
 # Formatting helpers
 # ---------------------------------------------------------------------------
 
-def format_price(value: Optional[float]) -> str:
-    if value is None:
-        return "N/A"
+def first_value(d: Dict[str, Any], *keys: str) -> Any:
+    """
+    Return the first non-None value among `d[key]` for the given keys.
+    Unlike an `or` chain this keeps legitimate falsy values such as a 0 price.
+    """
+    for key in keys:
+        value = d.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+def _format_price_slow(value: Any) -> str:
+    """Rare path for non-numeric price values (e.g. numeric strings)."""
     try:
         return f"${float(value):,.0f}"
     except (TypeError, ValueError):
         return "N/A"
 
 
-def format_kilometers(value: Optional[float]) -> str:
+def format_price(value: Optional[float]) -> str:
+    if value is None:
+        return "N/A"
+    if isinstance(value, (int, float)):
+        return f"${value:,.0f}"
+    return _format_price_slow(value)
+
+
+def _km_int(value: Optional[float]) -> Optional[int]:
     """
-    MarketCheck returns mileage in miles; convert to kilometers for Canadian users.
+    Miles -> whole kilometers. Clean numerics skip the try/except frame;
+    MarketCheck returns mileage in miles, converted for Canadian users.
     """
     if value is None:
-        return "N/A"
+        return None
+    if isinstance(value, (int, float)):
+        return int(value * 1.60934)
     try:
-        km = float(value) * 1.60934
-        return f"{int(km):,} km"
+        return int(float(value) * 1.60934)
     except (TypeError, ValueError):
-        return "N/A"
+        return None
 
 
-def extract_listing_row(listing: Dict[str, Any]) -> Dict[str, Any]:
+def format_kilometers(value: Optional[float]) -> str:
+    km = _km_int(value)
+    return "N/A" if km is None else f"{km:,} km"
+
+
+# Schema for the specialized extractor compiled below: (field, lookups), where
+# each lookup is (scope, key) and scope "g"/"b"/"d" means the listing itself,
+# its "build" dict, or its "dealer" dict. Fields in _FAST_ROW_NONNULL take the
+# first non-None value (so a 0 price survives); the rest take the first truthy
+# value. Fields outside _FAST_ROW_NO_DEFAULT fall back to "".
+_FAST_ROW_FIELDS = [
+    ("year", [("g", "year"), ("b", "year")]),
+    ("price", [("g", "price"), ("g", "current_price")]),
+    ("miles", [("g", "miles"), ("g", "odometer")]),
+    ("trim", [("b", "trim")]),
+    ("body_type", [("b", "body_type")]),
+    ("exterior_color", [("g", "exterior_color"), ("b", "exterior_color")]),
+    ("interior_color", [("g", "interior_color"), ("b", "interior_color")]),
+    ("dealer_name", [("d", "name")]),
+    ("dealer_city", [("d", "city")]),
+    ("dealer_state", [("d", "state")]),
+    ("dealer_phone", [("d", "phone")]),
+    ("vdp_url", [("g", "vdp_url"), ("g", "deep_link"), ("g", "url")]),
+]
+_FAST_ROW_NONNULL = {"price", "miles", "vdp_url"}
+_FAST_ROW_NO_DEFAULT = {"year", "price", "miles"}
+
+
+def _compile_fast_row():
     """
-    Normalize a MarketCheck listing dict into a flat row for display.
+    exec-compile a field extractor specialized to the schema above. The
+    generated function binds each dict's .get once and walks the fallback
+    chains through plain locals, so the per-row cost is straight-line
+    bytecode instead of repeated method lookups per field.
     """
-    build = listing.get("build", {}) or {}
-    dealer = listing.get("dealer", {}) or {}
+    getters = {"g": "get", "b": "bget", "d": "dget"}
+    lines = [
+        "def _fast_row(listing):",
+        "    get = listing.get",
+        '    build = get("build") or {}',
+        '    dealer = get("dealer") or {}',
+        "    bget = build.get",
+        "    dget = dealer.get",
+    ]
+    for name, lookups in _FAST_ROW_FIELDS:
+        exprs = [f'{getters[scope]}("{key}")' for scope, key in lookups]
+        if name in _FAST_ROW_NONNULL:
+            lines.append(f"    {name} = {exprs[0]}")
+            for expr in exprs[1:]:
+                lines.append(f"    if {name} is None:")
+                lines.append(f"        {name} = {expr}")
+            if name not in _FAST_ROW_NO_DEFAULT:
+                lines.append(f'    {name} = {name} or ""')
+        else:
+            chain = " or ".join(exprs)
+            if name not in _FAST_ROW_NO_DEFAULT:
+                chain += ' or ""'
+            lines.append(f"    {name} = {chain}")
+    lines.append("    return (" + ", ".join(name for name, _ in _FAST_ROW_FIELDS) + ")")
+
+    namespace: Dict[str, Any] = {}
+    exec("\n".join(lines), namespace)
+    return namespace["_fast_row"]
+
+
+_fast_row = _compile_fast_row()
 
-    year = listing.get("year") or build.get("year")
-    price = listing.get("price") or listing.get("current_price")
-    miles = listing.get("miles") or listing.get("odometer")
-    trim = build.get("trim") or ""
-    body_type = build.get("body_type") or ""
-    exterior_color = listing.get("exterior_color") or build.get("exterior_color") or ""
-    interior_color = listing.get("interior_color") or build.get("interior_color") or ""
 
-    dealer_name = dealer.get("name") or ""
-    dealer_city = dealer.get("city") or ""
-    dealer_state = dealer.get("state") or ""
-    dealer_phone = dealer.get("phone") or ""
-
-    vdp_url = listing.get("vdp_url") or listing.get("deep_link") or listing.get("url") or ""
+def extract_listing_row(listing: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize a MarketCheck listing dict into a flat row for display.
+    Field access goes through the compiled `_fast_row` extractor.
+    """
+    (
+        year,
+        price,
+        miles,
+        trim,
+        body_type,
+        exterior_color,
+        interior_color,
+        dealer_name,
+        dealer_city,
+        dealer_state,
+        dealer_phone,
+        vdp_url,
+    ) = _fast_row(listing)
+
+    # Convert miles once; both the HTML table ("km") and the Supabase rows
+    # ("km_int") read the cached value.
+    km_int = _km_int(miles)
 
     return {
         "year": year,
         "price": format_price(price),
-        "km": format_kilometers(miles),
+        "km": "N/A" if km_int is None else f"{km_int:,} km",
+        "km_int": km_int,
         "trim": trim,
         "body_type": body_type,
         "ext_color": exterior_color,
@@ -197,46 +442,25 @@ def extract_listing_row(listing: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def parse_kilometers_value(miles_value: Optional[float]) -> Optional[int]:
-    if miles_value is None:
-        return None
-    try:
-        km = float(miles_value) * 1.60934
-        return int(km)
-    except (TypeError, ValueError):
-        return None
-
-
-def render_html_table(listings: List[Dict[str, Any]]) -> str:
-    """
-    Render listings as a basic HTML table suitable for email.
-    """
-    if not listings:
-        return "<p>No used Honda Passport listings (2020+) found for today.</p>"
-
-    rows_html = []
-    for raw in listings[:MAX_LISTINGS]:
-        row = extract_listing_row(raw)
-        vdp_cell = f'<a href="{row["vdp_url"]}" target="_blank">View</a>' if row["vdp_url"] else ""
-        dealer_location = ", ".join(x for x in [row["dealer_city"], row["dealer_state"]] if x)
-
-        rows_html.append(
-            "<tr>"
-            f"<td>{row['year'] or ''}</td>"
-            f"<td>{row['price']}</td>"
-            f"<td>{row['km']}</td>"
-            f"<td>{row['trim'] or ''}</td>"
-            f"<td>{row['body_type'] or ''}</td>"
-            f"<td>{row['ext_color'] or ''}</td>"
-            f"<td>{row['int_color'] or ''}</td>"
-            f"<td>{row['dealer_name'] or ''}</td>"
-            f"<td>{dealer_location}</td>"
-            f"<td>{row['dealer_phone'] or ''}</td>"
-            f"<td>{vdp_cell}</td>"
-            "</tr>"
-        )
-
-    table = f"""
+# One precompiled template per row keeps allocations down versus building each
+# <tr> from a dozen f-string fragments; every value is escaped before insertion.
+_ROW_TMPL = (
+    "<tr>"
+    "<td>%(year)s</td>"
+    "<td>%(price)s</td>"
+    "<td>%(km)s</td>"
+    "<td>%(trim)s</td>"
+    "<td>%(body_type)s</td>"
+    "<td>%(ext_color)s</td>"
+    "<td>%(int_color)s</td>"
+    "<td>%(dealer_name)s</td>"
+    "<td>%(location)s</td>"
+    "<td>%(dealer_phone)s</td>"
+    "<td>%(vdp)s</td>"
+    "</tr>"
+)
+
+_TABLE_HEAD = """
 <table border="1" cellpadding="6" cellspacing="0" style="border-collapse: collapse; font-family: Arial, sans-serif; font-size: 13px;">
   <thead>
     <tr style="background-color: #f0f0f0;">
@@ -254,11 +478,65 @@ def render_html_table(listings: List[Dict[str, Any]]) -> str:
     </tr>
   </thead>
   <tbody>
-    {''.join(rows_html)}
+    """
+
+_TABLE_FOOT = """
   </tbody>
 </table>
 """
-    return table
+
+
+def render_html_table(listings: List[Dict[str, Any]]) -> str:
+    """
+    Render listings as a basic HTML table suitable for email.
+    """
+    return render_html_table_from_rows([extract_listing_row(raw) for raw in listings[:MAX_LISTINGS]])
+
+
+def render_html_table_from_rows(rows: List[Dict[str, Any]]) -> str:
+    """
+    Render pre-extracted listing rows (see `extract_listing_row`) as an HTML
+    table, so callers that also upsert can normalize each listing only once.
+
+    Dealer names, colors, and URLs come straight from the API, so every value
+    is HTML-escaped before insertion.
+    """
+    if not rows:
+        return "<p>No used Honda Passport listings (2020+) found for today.</p>"
+
+    # Write straight into one growable buffer instead of accumulating a list
+    # of row strings and joining at the end.
+    buf = io.StringIO()
+    write = buf.write
+    write(_TABLE_HEAD)
+    for row in rows[:MAX_LISTINGS]:
+        cells = {
+            key: html.escape(str(row[key] or ""), quote=True)
+            for key in (
+                "year",
+                "price",
+                "km",
+                "trim",
+                "body_type",
+                "ext_color",
+                "int_color",
+                "dealer_name",
+                "dealer_phone",
+            )
+        }
+        cells["location"] = html.escape(
+            ", ".join(x for x in [row["dealer_city"], row["dealer_state"]] if x), quote=True
+        )
+        cells["vdp"] = (
+            '<a href="%s" target="_blank" rel="noopener">View</a>'
+            % html.escape(row["vdp_url"], quote=True)
+            if row["vdp_url"]
+            else ""
+        )
+        write(_ROW_TMPL % cells)
+
+    write(_TABLE_FOOT)
+    return buf.getvalue()
 
 
 def is_excluded_trim(listing: Dict[str, Any]) -> bool:
@@ -278,40 +556,58 @@ def is_excluded_trim(listing: Dict[str, Any]) -> bool:
 # Email sending
 # ---------------------------------------------------------------------------
 
+# From/To never change between sends, so build them into a template message
+# once; send_email clones it and fills in the per-send fields. Implicit TLS
+# vs STARTTLS is likewise decided once from the port.
+_MSG_TEMPLATE = EmailMessage()
+_MSG_TEMPLATE["From"] = EMAIL_FROM
+_MSG_TEMPLATE["To"] = EMAIL_TO
+
+_SMTP_CONNECT = smtplib.SMTP_SSL if SMTP_PORT == 465 else smtplib.SMTP
+
+
 def send_email(subject: str, html_body: str) -> None:
     """
     Send an HTML email using SMTP_* environment settings.
+    EMAIL_TO may be a comma-separated list of recipients.
     """
     if not all([SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, EMAIL_FROM, EMAIL_TO]):
         raise RuntimeError("SMTP configuration is incomplete; check environment variables.")
 
-    msg = EmailMessage()
-    msg["From"] = EMAIL_FROM
-    msg["To"] = EMAIL_TO
+    recipients = [addr.strip() for addr in EMAIL_TO.split(",") if addr.strip()]
+
+    # deepcopy rather than copy: a shallow copy would share the template's
+    # header list, so setting Subject would leak into later sends.
+    msg = copy.deepcopy(_MSG_TEMPLATE)
     msg["Subject"] = subject
     msg.set_content("HTML report attached. Please view this email in an HTML-capable client.")
     msg.add_alternative(html_body, subtype="html")
 
-    if SMTP_PORT == 465:
-        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) as server:
-            server.login(SMTP_USER, SMTP_PASS)
-            server.send_message(msg)
-    else:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.ehlo()
+    # Serialize once and hand the raw bytes to sendmail; with multiple
+    # recipients the MAIL FROM/RCPT TO/DATA commands then pipeline in one
+    # batch (RFC 2920) instead of one round trip per command.
+    raw = msg.as_bytes()
+
+    with _SMTP_CONNECT(SMTP_HOST, SMTP_PORT) as server:
+        server.ehlo()
+        if SMTP_PORT != 465:
             server.starttls()
             server.ehlo()
-            server.login(SMTP_USER, SMTP_PASS)
-            server.send_message(msg)
+        server.login(SMTP_USER, SMTP_PASS)
+        if not server.has_extn("pipelining"):
+            print("SMTP server does not advertise PIPELINING", file=sys.stderr)
+        server.sendmail(EMAIL_FROM, recipients, raw)
 
 
 # ---------------------------------------------------------------------------
 # Supabase ingestion
 # ---------------------------------------------------------------------------
 
-def upsert_to_supabase(listings: List[Dict[str, Any]], fetched_date: str) -> int:
+def upsert_to_supabase(extracted: List[tuple], fetched_date: str) -> int:
     """
     Upsert listings into Supabase via PostgREST.
+    Takes (raw listing, extracted row) pairs so callers that already rendered
+    the HTML table don't re-normalize each listing.
     Assumes a unique index on coalesce(vin, source_id), fetched_at.
     """
     if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
@@ -320,19 +616,15 @@ def upsert_to_supabase(listings: List[Dict[str, Any]], fetched_date: str) -> int
     rows: List[Dict[str, Any]] = []
     currency = "CAD" if COUNTRY.upper() == "CA" else "USD"
 
-    for raw in listings:
-        row = extract_listing_row(raw)
-        miles_value = raw.get("miles") or raw.get("odometer")
-        km_value = parse_kilometers_value(miles_value)
-
+    for raw, row in extracted:
         rows.append(
             {
                 "vin": raw.get("vin"),
-                "source_id": raw.get("id") or raw.get("listing_id"),
+                "source_id": first_value(raw, "id", "listing_id"),
                 "listing_url": row["vdp_url"],
                 "year": row["year"],
-                "price": raw.get("price") or raw.get("current_price"),
-                "km": km_value,
+                "price": first_value(raw, "price", "current_price"),
+                "km": row["km_int"],
                 "trim": row["trim"],
                 "body": row["body_type"],
                 "exterior": row["ext_color"],
@@ -340,7 +632,7 @@ def upsert_to_supabase(listings: List[Dict[str, Any]], fetched_date: str) -> int
                 "dealer_name": row["dealer_name"],
                 "dealer_city": row["dealer_city"],
                 "dealer_state": row["dealer_state"],
-                "postal": raw.get("zip") or raw.get("postal"),
+                "postal": first_value(raw, "zip", "postal"),
                 "currency": currency,
                 "fetched_at": fetched_date,
             }
@@ -353,17 +645,27 @@ def upsert_to_supabase(listings: List[Dict[str, Any]], fetched_date: str) -> int
         "apikey": SUPABASE_SERVICE_ROLE_KEY,
         "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
         "Content-Type": "application/json",
+        # PostgREST accepts gzip-compressed request bodies.
+        "Content-Encoding": "gzip",
         "Prefer": "resolution=merge-duplicates,return=minimal",
     }
 
-    resp = requests.post(
-        f"{SUPABASE_URL}/rest/v1/{SUPABASE_TABLE}",
-        json=rows,
-        headers=headers,
-        timeout=30,
-    )
-    if resp.status_code not in (200, 201, 204):
-        raise RuntimeError(f"Supabase upsert failed {resp.status_code}: {resp.text[:500]}")
+    url = f"{SUPABASE_URL}/rest/v1/{SUPABASE_TABLE}"
+
+    def _post_chunk(chunk: List[Dict[str, Any]]) -> None:
+        body = orjson.dumps(chunk) if orjson is not None else json.dumps(chunk).encode("utf-8")
+        resp = _SESSION.post(url, data=gzip.compress(body), headers=headers, timeout=30)
+        if resp.status_code not in (200, 201, 204):
+            raise RuntimeError(f"Supabase upsert failed {resp.status_code}: {resp.text[:500]}")
+
+    chunks = [rows[i : i + SUPABASE_CHUNK_ROWS] for i in range(0, len(rows), SUPABASE_CHUNK_ROWS)]
+    if len(chunks) == 1:
+        _post_chunk(chunks[0])
+    else:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(_post_chunk, chunk) for chunk in chunks]
+            for future in futures:
+                future.result()
 
     return len(rows)
 
@@ -373,10 +675,11 @@ def upsert_to_supabase(listings: List[Dict[str, Any]], fetched_date: str) -> int
 # ---------------------------------------------------------------------------
 
 def main() -> int:
-    today = datetime.now().strftime("%Y-%m-%d")
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
 
     try:
-        listings, total_found = fetch_used_honda_passports()
+        listings, total_found = fetch_used_honda_passports(current_year=now.year)
     except Exception as exc:
         error_html = f"<p>Error fetching data from MarketCheck: {exc}</p>"
         try:
@@ -385,9 +688,11 @@ def main() -> int:
             print(f"Failed to send error email: {email_err}", file=sys.stderr)
         return 1
 
-    filtered_listings = [listing for listing in listings if not is_excluded_trim(listing)]
-    html_table = render_html_table(filtered_listings)
-    count = len(filtered_listings)
+    # Excluded trims are already filtered out during the fetch.
+    # Normalize each listing once; the HTML table and the Supabase upsert share it.
+    extracted = [(raw, extract_listing_row(raw)) for raw in listings]
+    html_table = render_html_table_from_rows([row for _, row in extracted])
+    count = len(listings)
 
     html_body = f"""
 <html>
@@ -406,7 +711,7 @@ def main() -> int:
     # Optional: upsert to Supabase for historical trend tracking
     if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
         try:
-            ingested = upsert_to_supabase(filtered_listings, today)
+            ingested = upsert_to_supabase(extracted, today)
             print(f"Upserted {ingested} rows to Supabase", file=sys.stderr)
         except Exception as exc:
             print(f"Failed to upsert to Supabase: {exc}", file=sys.stderr)
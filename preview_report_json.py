@@ -5,9 +5,15 @@ Outputs JSON with the rendered HTML body and the rows that would be upserted.
 """
 
 import json
+import sys
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+try:
+    import orjson  # much faster C JSON parser/serializer; optional
+except ImportError:
+    orjson = None
+
 from daily_passport_report import (
     COUNTRY,
     MIN_YEAR,
@@ -15,29 +21,24 @@ from daily_passport_report import (
     SUPABASE_URL,
     extract_listing_row,
     fetch_used_honda_passports,
-    is_excluded_trim,
-    parse_kilometers_value,
-    render_html_table,
+    first_value,
+    render_html_table_from_rows,
 )
 
 
-def build_supabase_rows(listings: List[Dict[str, Any]], fetched_date: str) -> List[Dict[str, Any]]:
+def build_supabase_rows(extracted: List[tuple], fetched_date: str) -> List[Dict[str, Any]]:
     currency = "CAD" if COUNTRY.upper() == "CA" else "USD"
     rows: List[Dict[str, Any]] = []
 
-    for raw in listings:
-        row = extract_listing_row(raw)
-        miles_value = raw.get("miles") or raw.get("odometer")
-        km_value = parse_kilometers_value(miles_value)
-
+    for raw, row in extracted:
         rows.append(
             {
                 "vin": raw.get("vin"),
-                "source_id": raw.get("id") or raw.get("listing_id"),
+                "source_id": first_value(raw, "id", "listing_id"),
                 "listing_url": row["vdp_url"],
                 "year": row["year"],
-                "price": raw.get("price") or raw.get("current_price"),
-                "km": km_value,
+                "price": first_value(raw, "price", "current_price"),
+                "km": row["km_int"],
                 "trim": row["trim"],
                 "body": row["body_type"],
                 "exterior": row["ext_color"],
@@ -45,7 +46,7 @@ def build_supabase_rows(listings: List[Dict[str, Any]], fetched_date: str) -> Li
                 "dealer_name": row["dealer_name"],
                 "dealer_city": row["dealer_city"],
                 "dealer_state": row["dealer_state"],
-                "postal": raw.get("zip") or raw.get("postal"),
+                "postal": first_value(raw, "zip", "postal"),
                 "currency": currency,
                 "fetched_at": fetched_date,
             }
@@ -55,17 +56,20 @@ def build_supabase_rows(listings: List[Dict[str, Any]], fetched_date: str) -> Li
 
 
 def main() -> int:
-    today = datetime.now().strftime("%Y-%m-%d")
-    listings, total_found = fetch_used_honda_passports()
-    filtered_listings = [listing for listing in listings if not is_excluded_trim(listing)]
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    listings, total_found = fetch_used_honda_passports(current_year=now.year)
+    # Excluded trims are already filtered out during the fetch.
+    # Normalize each listing once; the HTML table and the Supabase rows share it.
+    extracted = [(raw, extract_listing_row(raw)) for raw in listings]
 
-    html_table = render_html_table(filtered_listings)
+    html_table = render_html_table_from_rows([row for _, row in extracted])
     html_body = f"""
 <html>
   <body>
     <p>Daily used Honda Passport report (year >= {MIN_YEAR}).</p>
     <p>Date: {today}</p>
-    <p>Total listings returned: {len(filtered_listings)} (of {total_found} found)</p>
+    <p>Total listings returned: {len(listings)} (of {total_found} found)</p>
     {html_table}
     <p style="font-size: 11px; color: #666; margin-top: 16px;">
       Data source: MarketCheck Cars API.
@@ -76,17 +80,25 @@ def main() -> int:
 
     supabase_rows: Optional[List[Dict[str, Any]]] = None
     if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
-        supabase_rows = build_supabase_rows(filtered_listings, today)
+        supabase_rows = build_supabase_rows(extracted, today)
 
     payload = {
         "date": today,
         "total_found": total_found,
-        "count": len(filtered_listings),
+        "count": len(listings),
         "html_body": html_body,
         "supabase_rows": supabase_rows,
     }
 
-    print(json.dumps(payload, indent=2))
+    # Write the serialized bytes straight to stdout; orjson leaves non-ASCII
+    # (dealer names etc.) unescaped, and the fallback matches that.
+    if orjson is not None:
+        sys.stdout.buffer.write(
+            orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        )
+        sys.stdout.buffer.write(b"\n")
+    else:
+        print(json.dumps(payload, indent=2, ensure_ascii=False))
     return 0
 
 